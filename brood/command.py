@@ -8,7 +8,7 @@ from dataclasses import dataclass, field
 from enum import Enum, unique
 from functools import cached_property
 from signal import SIGKILL, SIGTERM
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional
 
 import psutil
 
@@ -16,6 +16,17 @@ from brood.config import CommandConfig
 from brood.fanout import Fanout
 from brood.message import CommandMessage, InternalMessage, Message, Verbosity
 
+STATS_ATTRS = ["cpu_percent", "memory_full_info"]
+
+READ_CHUNK_SIZE = 2**16
+
+# The output stream's reader pauses the pipe once it has buffered about twice this much.
+STREAM_LIMIT = 2**20
+
+
+def base_env() -> Dict[str, str]:
+    return {**os.environ, "FORCE_COLOR": "true"}
+
 
 @unique
 class EventType(Enum):
@@ -25,6 +36,8 @@ class EventType(Enum):
 
 @dataclass(frozen=True)
 class Event:
+    __slots__ = ("manager", "type")
+
     manager: Command
     type: EventType
 
@@ -49,6 +62,7 @@ class Command:
 
     reader: Optional[Task[None]] = None
     statser: Optional[Task[None]] = None
+    waiter: Optional[Task[Command]] = None
 
     @classmethod
     async def start(
@@ -57,6 +71,7 @@ class Command:
         events: Fanout[Event],
         messages: Fanout[Message],
         width: int = 80,
+        env: Optional[Mapping[str, str]] = None,
     ) -> Command:
         await messages.put(
             InternalMessage(
@@ -68,7 +83,8 @@ class Command:
             config.command_string,
             stdout=PIPE,
             stderr=STDOUT,
-            env={**os.environ, "FORCE_COLOR": "true", "COLUMNS": str(width)},
+            limit=STREAM_LIMIT,
+            env={**(env if env is not None else base_env()), "COLUMNS": str(width)},
             preexec_fn=os.setsid,
         )
 
@@ -92,7 +108,7 @@ class Command:
         self.statser = create_task(
             self.get_stats(), name=f"Collect stats for {self.config.command_string!r}"
         )
-        create_task(self.wait(), name=f"Wait for {self.config.command_string!r}")
+        self.waiter = create_task(self.wait(), name=f"Wait for {self.config.command_string!r}")
 
     @property
     def pid(self) -> int:
@@ -165,17 +181,41 @@ class Command:
         if self.process.stdout is None:  # pragma: unreachable
             raise Exception(f"{self.process} does not have an associated stream reader")
 
+        buffer = bytearray()
         while True:
-            line = await self.process.stdout.readline()
-            if not line:
+            chunk = await self.process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
                 break
 
-            await self.messages.put(
-                CommandMessage(
-                    text=line.decode("utf-8").rstrip(),
-                    command_config=self.config,
-                )
+            created_at = time.time()
+
+            # Only the new chunk needs to be searched for the end of the last complete line.
+            scanned = len(buffer)
+            buffer += chunk
+            end = buffer.rfind(b"\n", scanned)
+            if end == -1:
+                continue
+
+            lines = buffer[:end].split(b"\n")
+            del buffer[: end + 1]
+
+            for line in lines:
+                await self.put_line(line, created_at)
+
+        if buffer:
+            await self.put_line(buffer, time.time())
+
+    async def put_line(self, line: bytes, created_at: float) -> None:
+        if line.endswith(b"\r"):
+            line = line[:-1]
+
+        await self.messages.put(
+            CommandMessage(
+                text=line.decode("utf-8", errors="replace"),
+                command_config=self.config,
+                created_at=created_at,
             )
+        )
 
     @cached_property
     def ps(self) -> Optional[psutil.Process]:
@@ -193,7 +233,7 @@ class Command:
             if p is None:
                 break
             else:
-                self.stats = p.as_dict()
+                self.stats = p.as_dict(attrs=STATS_ATTRS)
             await sleep(2)
 
     def __hash__(self) -> int:
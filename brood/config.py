@@ -64,6 +64,11 @@ class WatchConfig(BaseConfig):
         default=False,
         description="If true, poll for changes instead of waiting for change notifications.",
     )
+    debounce: float = Field(
+        default=0.05,
+        description="Changes to a path within this many seconds of the last change to it that started the command are ignored, since editors often write a file several times per save. Set to 0 to react to every change.",
+        ge=0,
+    )
 
     @property
     def description(self) -> str:
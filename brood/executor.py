@@ -14,6 +14,10 @@ from brood.message import InternalMessage, Message, Verbosity
 from brood.monitor import KillOthers, Monitor
 from brood.renderer import RENDERERS
 
+# Commands that produce output faster than it can be rendered
+# are paused (via their pipes) once this many messages are waiting.
+RENDERER_QUEUE_SIZE = 4096
+
 
 class Executor:
     def __init__(self, config: BroodConfig, console: Console, verbosity: Verbosity):
@@ -34,7 +38,7 @@ class Executor:
             console=self.console,
             verbosity=self.verbosity,
             events=self.events.consumer(),
-            messages=self.messages.consumer(),
+            messages=self.messages.consumer(maxsize=RENDERER_QUEUE_SIZE),
         )
 
         self.monitor = Monitor(
@@ -69,6 +73,12 @@ class Executor:
         for d in done:
             d.result()
 
+    async def stop_monitor(self, reason: Optional[InternalMessage]) -> None:
+        if reason is not None:
+            await self.messages.put(reason)
+
+        await self.monitor.stop()
+
     async def __aenter__(self) -> Executor:
         return self
 
@@ -78,30 +88,29 @@ class Executor:
         exc_val: Optional[BaseException],
         exc_tb: Optional[TracebackType],
     ) -> Optional[bool]:
+        reason: Optional[InternalMessage] = None
         if exc_type:
             if exc_type is CancelledError:
-                await self.messages.put(
-                    InternalMessage(
-                        f"Shutting down due to: keyboard interrupt", verbosity=Verbosity.INFO
-                    )
+                reason = InternalMessage(
+                    f"Shutting down due to: keyboard interrupt", verbosity=Verbosity.INFO
                 )
             elif exc_type is KillOthers:
-                await self.messages.put(
-                    InternalMessage(
-                        f"Shutting down due to: command failing", verbosity=Verbosity.INFO
-                    )
+                reason = InternalMessage(
+                    f"Shutting down due to: command failing", verbosity=Verbosity.INFO
                 )
             else:
-                await self.messages.put(
-                    InternalMessage(
-                        f"Shutting down due to: {exc_type.__name__}: {exc_val}\n{''.join(format_exc())}",
-                        verbosity=Verbosity.ERROR,
-                    )
+                reason = InternalMessage(
+                    f"Shutting down due to: {exc_type.__name__}: {exc_val}\n{''.join(format_exc())}",
+                    verbosity=Verbosity.ERROR,
                 )
 
         # Stop the monitor while repeatedly draining the renderer,
         # so that we can emit output during shutdown.
-        stop_monitor = create_task(self.monitor.stop(), name=f"Stop {type(self.monitor).__name__}")
+        # The renderer's queue is bounded, so even the shutdown reason
+        # has to be sent while the renderer is being drained.
+        stop_monitor = create_task(
+            self.stop_monitor(reason), name=f"Stop {type(self.monitor).__name__}"
+        )
         drain_renderer = create_task(
             self.renderer.run(drain=True), name=f"Drain {type(self.renderer)}"
         )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from asyncio import Queue, gather
+from asyncio import Queue, QueueFull
 from dataclasses import dataclass, field
 from typing import Generic, List, TypeVar
 
@@ -12,14 +12,19 @@ class Fanout(Generic[T]):
     queues: List[Queue[T]] = field(default_factory=list)
 
     async def put(self, item: T) -> None:
-        await gather(*(q.put(item) for q in self.queues))
+        # Only suspend (to apply backpressure) if a bounded consumer is full.
+        for q in self.queues:
+            try:
+                q.put_nowait(item)
+            except QueueFull:
+                await q.put(item)
 
     def put_nowait(self, item: T) -> None:
         for q in self.queues:
             q.put_nowait(item)
 
-    def consumer(self) -> Queue[T]:
-        q: Queue[T] = Queue()
+    def consumer(self, maxsize: int = 0) -> Queue[T]:
+        q: Queue[T] = Queue(maxsize=maxsize)
 
         self.queues.append(q)
 
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+# A run of consecutive rules that share a polarity (negated or not)
+# and whether they only match directories, compiled into a single alternation.
+RuleGroup = Tuple[bool, bool, Pattern[str]]
+
+MAX_REMEMBERED_DIRECTORIES = 10_000
+
+
+@dataclass(frozen=True)
+class GitIgnore:
+    """
+    A matcher for the rules in a single .gitignore file,
+    compiled into a handful of regular expressions.
+    """
+
+    base: str  # the absolute path of the .gitignore's directory, with a trailing separator
+    groups: Tuple[RuleGroup, ...]  # in reverse order, so that the first match wins
+    directories: Dict[str, bool] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def parse(cls, path: Path) -> GitIgnore:
+        base = os.path.join(os.path.abspath(path.parent), "")
+
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return cls(base=base, groups=())
+
+        return cls.from_lines(text.splitlines(), base=base)
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], base: str) -> GitIgnore:
+        base = os.path.join(base, "")
+
+        groups: List[Tuple[bool, bool, List[str]]] = []
+        for line in lines:
+            rule = parse_rule(line)
+            if rule is None:
+                continue
+
+            negated, dir_only, regex = rule
+
+            try:
+                re.compile(regex)
+            except re.error:  # e.g., a character range like [z-a]
+                continue
+
+            if groups and groups[-1][:2] == (negated, dir_only):
+                groups[-1][2].append(regex)
+            else:
+                groups.append((negated, dir_only, [regex]))
+
+        return cls(
+            base=base,
+            groups=tuple(
+                (negated, dir_only, re.compile("|".join(regexes), re.DOTALL))
+                for negated, dir_only, regexes in reversed(groups)
+            ),
+        )
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        if not self.groups:
+            return False
+
+        path = os.path.abspath(path)
+        if not path.startswith(self.base):
+            return False
+
+        relative = path[len(self.base) :].replace(os.sep, "/")
+
+        # A path is ignored if any of its parent directories are,
+        # and nothing inside an ignored directory can be un-ignored.
+        parent = relative.rpartition("/")[0]
+        if parent and self.directory_ignored(parent):
+            return True
+
+        return bool(self.decide(relative, is_dir=is_dir))
+
+    def directory_ignored(self, relative: str) -> bool:
+        # Most events come from a handful of directories, so remember their verdicts.
+        ignored = self.directories.get(relative)
+        if ignored is None:
+            parent = relative.rpartition("/")[0]
+            ignored = bool(parent and self.directory_ignored(parent)) or bool(
+                self.decide(relative, is_dir=True)
+            )
+
+            if len(self.directories) >= MAX_REMEMBERED_DIRECTORIES:
+                self.directories.clear()
+            self.directories[relative] = ignored
+
+        return ignored
+
+    def decide(self, relative: str, is_dir: bool) -> Optional[bool]:
+        for negated, dir_only, pattern in self.groups:
+            if dir_only and not is_dir:
+                continue
+
+            if pattern.fullmatch(relative):
+                return not negated
+
+        return None
+
+
+def parse_rule(line: str) -> Optional[Tuple[bool, bool, str]]:
+    # Trailing spaces are ignored unless they are escaped.
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    if dir_only:
+        line = line.rstrip("/")
+
+    if not line:
+        return None
+
+    # A separator anywhere but the end anchors the pattern to the .gitignore's directory.
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    segments = line.split("/")
+    last = len(segments) - 1
+    regex = []
+    for index, segment in enumerate(segments):
+        if segment == "**":
+            # A leading or inner "**" matches any number of directories;
+            # a trailing one matches everything inside.
+            regex.append("(?:.*/)?" if index < last else ".*")
+        else:
+            regex.append(translate_segment(segment) + ("/" if index < last else ""))
+
+    return negated, dir_only, ("" if anchored else "(?:.*/)?") + "".join(regex)
+
+
+def translate_segment(segment: str) -> str:
+    regex = []
+    index = 0
+    length = len(segment)
+    while index < length:
+        char = segment[index]
+        index += 1
+
+        if char == "*":
+            while index < length and segment[index] == "*":
+                index += 1
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "\\" and index < length:
+            regex.append(re.escape(segment[index]))
+            index += 1
+        elif char == "[":
+            end = find_bracket_end(segment, index)
+            if end is None:
+                regex.append(re.escape(char))
+            else:
+                regex.append(translate_bracket(segment[index:end]))
+                index = end + 1
+        else:
+            regex.append(re.escape(char))
+
+    return "".join(regex)
+
+
+def find_bracket_end(segment: str, start: int) -> Optional[int]:
+    index = start
+    if index < len(segment) and segment[index] in "!^":
+        index += 1
+    if index < len(segment) and segment[index] == "]":
+        index += 1
+
+    while index < len(segment):
+        if segment[index] == "\\":
+            index += 2
+        elif segment[index] == "]":
+            return index
+        else:
+            index += 1
+
+    return None
+
+
+def translate_bracket(contents: str) -> str:
+    negated = contents[:1] in ("!", "^")
+    if negated:
+        contents = contents[1:]
+
+    chars = []
+    index = 0
+    while index < len(contents):
+        char = contents[index]
+        index += 1
+
+        if char == "\\" and index < len(contents):
+            chars.append(re.escape(contents[index]))
+            index += 1
+        elif char == "-":
+            chars.append(char)
+        else:
+            chars.append(re.escape(char))
+
+    return f"[^/{''.join(chars)}]" if negated else f"[{''.join(chars)}]"
@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 from asyncio import create_task
 from pathlib import Path
+from typing import Any, Coroutine
 
 from click.exceptions import Exit
 from rich.console import Console
@@ -63,11 +64,22 @@ def run(
         return
 
     try:
-        asyncio.run(execute(config, console, verbosity), debug=verbosity.is_debug)
+        run_event_loop(execute(config, console, verbosity), debug=verbosity.is_debug)
     except KeyboardInterrupt:
         raise Exit(code=0)
 
 
+def run_event_loop(main: Coroutine[Any, Any, None], debug: bool = False) -> None:
+    """Run the coroutine on uvloop's event loop, if it is installed (e.g., via the uvloop extra)."""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main, debug=debug)
+        return
+
+    uvloop.run(main, debug=debug)
+
+
 async def execute(config: BroodConfig, console: Console, verbosity: Verbosity) -> None:
     async with Executor(config=config, console=console, verbosity=verbosity) as executor:
         await create_task(executor.run(), name=f"Run {type(executor).__name__}")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, unique
@@ -43,14 +44,26 @@ class Verbosity(str, Enum):
 class InternalMessage:
     text: str
     verbosity: Verbosity
-    timestamp: datetime = field(default_factory=datetime.now)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
 
 
 @dataclass(frozen=True)
 class CommandMessage:
+    # One of these is created for every line of output, so keep them small.
+    # (The slotted fields can't have defaults, so the time must be passed in.)
+    __slots__ = ("text", "command_config", "created_at")
+
     text: str
     command_config: CommandConfig
-    timestamp: datetime = field(default_factory=datetime.now)
+    created_at: float
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
 
 
 Message = Union[InternalMessage, CommandMessage]
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
-from asyncio import FIRST_EXCEPTION, Queue, create_task, gather, get_running_loop, wait
+from asyncio import (
+    FIRST_EXCEPTION,
+    CancelledError,
+    Queue,
+    create_task,
+    gather,
+    get_running_loop,
+    shield,
+    wait,
+)
 from dataclasses import dataclass, field
 from functools import partial
-from typing import List, Mapping, Set
+from typing import Dict, List, Mapping, Set
 
-from brood.command import Command, Event, EventType
+from brood.command import Command, Event, EventType, base_env
 from brood.config import BroodConfig, CommandConfig, FailureMode, RestartConfig, WatchConfig
 from brood.fanout import Fanout
 from brood.message import InternalMessage, Message, Verbosity
@@ -31,8 +40,12 @@ class Monitor:
 
     events_consumer: Queue[Event] = field(init=False)
 
+    # Copying os.environ is slow, so do it once instead of every time a command starts.
+    env: Dict[str, str] = field(init=False)
+
     def __post_init__(self) -> None:
         self.events_consumer = self.events.consumer()
+        self.env = base_env()
 
     async def start_commands(self) -> None:
         await gather(*(self.start_command(command) for command in self.config.commands))
@@ -43,6 +56,7 @@ class Monitor:
             events=self.events,
             messages=self.messages,
             width=self.widths[command_config],
+            env=self.env,
         )
 
     async def run(self) -> None:
@@ -151,13 +165,30 @@ class Monitor:
         await self.wait()
 
     async def wait(self) -> None:
-        await gather(*(manager.wait() for manager in self.managers))
+        await gather(*(self.wait_for(manager) for manager in self.managers))
 
         await self.handle_events(drain=True)
 
         for watcher in self.watchers:
             watcher.join()
 
+    @staticmethod
+    async def wait_for(manager: Command) -> None:
+        # Each command is already being waited on by its own task,
+        # which sends its Stopped event; waiting again would send another.
+        # But that task may have been cancelled, e.g., by asyncio.run on Ctrl-C,
+        # in which case nothing else is going to send the Stopped event.
+        waiter = manager.waiter
+        if waiter is not None:
+            try:
+                await shield(waiter)
+                return
+            except CancelledError:
+                if not waiter.cancelled():
+                    raise  # we were cancelled, not the waiter
+
+        await manager.wait()
+
     async def terminate(self) -> None:
         await gather(*(manager.terminate() for manager in self.managers))
 
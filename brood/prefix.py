@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, replace
+from functools import cached_property
+from string import Formatter
+from typing import FrozenSet, List, Mapping, Optional, Tuple, Union
+
+from rich.errors import MarkupError
+from rich.style import Style
+from rich.text import Text
+
+FORMATTER = Formatter()
+
+RE_FIELD_KEY = re.compile(r"[.\[]")
+
+# Replacement fields are swapped out for characters from the Unicode private use area
+# while the markup is parsed, so that we can find them again in the parsed text.
+PLACEHOLDERS = range(0xE000, 0xF900)
+
+
+def is_placeholder(char: str) -> bool:
+    return ord(char) in PLACEHOLDERS
+
+
+@dataclass(frozen=True)
+class PrefixField:
+    name: str
+    conversion: Optional[str]
+    format_spec: str
+    styles: Tuple[Union[str, Style], ...]
+
+    @property
+    def key(self) -> str:
+        """The top-level field this field looks up (e.g., "timestamp" for "timestamp.hour")."""
+        return RE_FIELD_KEY.split(self.name, maxsplit=1)[0]
+
+    def format(self, fields: Mapping[str, object]) -> str:
+        value, _ = FORMATTER.get_field(self.name, (), fields)
+        return FORMATTER.format_field(
+            FORMATTER.convert_field(value, self.conversion), self.format_spec
+        )
+
+    def render(self, fields: Mapping[str, object]) -> Text:
+        text = Text(self.format(fields))
+        for style in self.styles:
+            text.stylize(style)
+
+        return text
+
+
+PrefixPart = Union[Text, PrefixField]
+
+
+@dataclass(frozen=True)
+class PrefixTemplate:
+    """
+    A prefix format string (which may contain Rich markup) that is parsed once, up front.
+
+    Formatted field values are inserted as plain text; they are not parsed as markup.
+    Templates that can't be parsed ahead of time
+    (e.g., because a replacement field is inside a markup tag)
+    are formatted and then parsed as markup each time they are rendered.
+    """
+
+    template: str
+    style: Union[str, Style]
+    parts: Optional[Tuple[PrefixPart, ...]]
+
+    @classmethod
+    def parse(cls, template: str, style: Union[str, Style] = "") -> PrefixTemplate:
+        try:
+            parts: Optional[Tuple[PrefixPart, ...]] = parse_parts(template)
+        except (ValueError, MarkupError):
+            parts = None
+
+        return cls(template=template, style=style, parts=parts)
+
+    def bind(self, fields: Mapping[str, object]) -> PrefixTemplate:
+        """
+        Fill in the given fields now,
+        returning a template with only the remaining fields left to fill in at render time.
+        """
+        if self.parts is None:
+            return self
+
+        parts: List[PrefixPart] = []
+        for part in self.parts:
+            if isinstance(part, PrefixField) and part.name in fields:
+                part = part.render(fields)
+
+            previous = parts[-1] if parts else None
+            if isinstance(part, Text) and isinstance(previous, Text):
+                parts[-1] = Text.assemble(previous, part)
+            else:
+                parts.append(part)
+
+        return replace(self, parts=tuple(parts))
+
+    @cached_property
+    def constant(self) -> Optional[Text]:
+        if self.parts is None or any(isinstance(part, PrefixField) for part in self.parts):
+            return None
+
+        return self.assemble(self.parts, {})
+
+    @cached_property
+    def keys(self) -> Optional[FrozenSet[str]]:
+        """The top-level fields still needed at render time, if they are known."""
+        if self.parts is None:
+            return None
+
+        return frozenset(part.key for part in self.parts if isinstance(part, PrefixField))
+
+    def uses(self, key: str) -> bool:
+        keys = self.keys
+        return keys is None or key in keys
+
+    def render(self, fields: Mapping[str, object]) -> Text:
+        if self.parts is None:
+            return Text.from_markup(self.template.format_map(fields), style=self.style)
+
+        constant = self.constant
+        if constant is not None:
+            return constant.copy()
+
+        return self.assemble(self.parts, fields)
+
+    def assemble(self, parts: Tuple[PrefixPart, ...], fields: Mapping[str, object]) -> Text:
+        text = Text(style=self.style)
+        for part in parts:
+            if isinstance(part, Text):
+                text.append_text(part)
+            else:
+                start = len(text)
+                text.append(part.format(fields))
+                for style in part.styles:
+                    text.stylize(style, start, len(text))
+
+        return text
+
+
+def parse_parts(template: str) -> Tuple[PrefixPart, ...]:
+    if any(is_placeholder(char) for char in template):
+        raise ValueError("Template contains characters that collide with placeholders")
+
+    marked: List[str] = []
+    fields: List[Tuple[str, Optional[str], str]] = []
+    for literal, name, format_spec, conversion in FORMATTER.parse(template):
+        marked.append(literal)
+        if name is None:
+            continue
+        if not name or "{" in (format_spec or ""):
+            raise ValueError("Positional and nested replacement fields are not supported")
+
+        marked.append(chr(PLACEHOLDERS[len(fields)]))
+        fields.append((name, conversion, format_spec or ""))
+
+    skeleton = Text.from_markup("".join(marked))
+
+    placeholder_offsets = [
+        offset for offset, char in enumerate(skeleton.plain) if is_placeholder(char)
+    ]
+    if len(placeholder_offsets) != len(fields):
+        raise ValueError("Replacement fields were consumed by markup")
+
+    cuts: List[int] = []
+    for offset in placeholder_offsets:
+        cuts.extend((offset, offset + 1))
+
+    parts: List[PrefixPart] = []
+    for piece in skeleton.divide(cuts):
+        if not piece.plain:
+            continue
+
+        if len(piece.plain) == 1 and is_placeholder(piece.plain):
+            name, conversion, format_spec = fields[PLACEHOLDERS.index(ord(piece.plain))]
+            parts.append(
+                PrefixField(
+                    name=name,
+                    conversion=conversion,
+                    format_spec=format_spec,
+                    styles=tuple(span.style for span in piece.spans),
+                )
+            )
+        else:
+            parts.append(piece)
+
+    return tuple(parts)
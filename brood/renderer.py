@@ -5,22 +5,36 @@ import re
 import shutil
 import time
 from asyncio import (
-    ALL_COMPLETED,
     FIRST_EXCEPTION,
     AbstractEventLoop,
     Queue,
     all_tasks,
     create_task,
     current_task,
+    gather,
     get_running_loop,
+    sleep,
     wait,
 )
 from dataclasses import dataclass
 from datetime import timedelta
-from functools import cached_property
+from functools import cached_property, lru_cache
+from operator import itemgetter
 from pathlib import Path
 from shutil import get_terminal_size
-from typing import Dict, Mapping, Optional, Type
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from colorama import Fore
 from colorama import Style as CStyle
@@ -36,17 +50,26 @@ from typing_extensions import Literal
 from brood.command import Command, Event, EventType
 from brood.config import CommandConfig, LogRendererConfig, RendererConfig
 from brood.message import CommandMessage, InternalMessage, Message, Verbosity
+from brood.prefix import PrefixTemplate
+from brood.utils import drain_queue
 
 GREEN_STYLE = Style(color="green")
 RED_STYLE = Style(color="red")
 BOLD_STYLE = Style(bold=True)
 DIM_STYLE = Style(dim=True)
+NOT_DIM_STYLE = Style(dim=False)
+DIM_ITALIC_STYLE = Style(dim=True, italic=True)
 DIM_RULE = Rule(style=DIM_STYLE)
 DASH_TEXT = Text("-")
 TIME_DASH_TEXT = Text("-:--:--")
+NEWLINE = Text("\n")
 
 NULL_STYLE = Style.null()
-RE_ANSI_ESCAPE = re.compile(r"(\x1b(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~]))")
+# Tabs (and other control characters) have no cell width, but can take up space when printed.
+RE_CONTROL_CHARACTER = re.compile(r"[\x00-\x1f\x7f]")
+RE_ANSI_ESCAPE = re.compile(
+    r"(\x1b(?:\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_]|\[[0-?]*[ -/]*[@-~]))", re.ASCII
+)
 ANSI_COLOR_TO_STYLE = {
     CStyle.RESET_ALL: NULL_STYLE,
     CStyle.NORMAL: NULL_STYLE,
@@ -63,30 +86,98 @@ ANSI_COLOR_TO_STYLE = {
 }
 
 
+@lru_cache(maxsize=None)
+def combine_styles(style: Style, new_style: Style) -> Style:
+    return Style.combine((style, new_style))
+
+
 def ansi_to_text(s: str) -> Text:
-    text = Text()
-    buffer = ""
+    return append_ansi(Text(), s)
+
+
+def append_ansi(text: Text, s: str) -> Text:
+    if "\x1b" not in s:
+        return text.append(s)
+
+    append = text.append
     style = NULL_STYLE
-    for char in RE_ANSI_ESCAPE.split(s):
-        if char in ANSI_COLOR_TO_STYLE:
-            # close current buffer
-            text = text.append(buffer, style=style)
+    position = 0
+    for match in RE_ANSI_ESCAPE.finditer(s):
+        escape = match.group()
+        new_style = ANSI_COLOR_TO_STYLE.get(escape)
+        if new_style is None:
+            if escape.startswith("\x1b]"):
+                # operating system commands, like window titles and hyperlinks, are dropped
+                append(s[position : match.start()], style=style)
+                position = match.end()
+
+            continue  # other unknown escapes are passed through as text
+
+        # close current span
+        append(s[position : match.start()], style=style)
 
-            # set up next buffer
-            new_style = ANSI_COLOR_TO_STYLE[char]
-            style = Style.combine((style, new_style)) if new_style is not NULL_STYLE else new_style
-            buffer = ""
-        else:
-            buffer += char
+        # set up next span
+        style = combine_styles(style, new_style) if new_style is not NULL_STYLE else new_style
+        position = match.end()
 
-    # catch leftover buffer
-    text.append(buffer, style=style)
+    # catch leftover text
+    append(s[position:], style=style)
 
     return text
 
 
+def wrap_after_prefix(text: Text, prefix_length: int, width: int) -> ConsoleRenderable:
+    """
+    Single lines of printable text that fit in the given width are returned as-is.
+    Anything else is split after its prefix and laid out in a grid,
+    so that the rest of the text wraps separately from the prefix.
+    """
+    if text.cell_len <= width and not RE_CONTROL_CHARACTER.search(text.plain):
+        return text
+
+    g = Table.grid()
+    g.add_row(*text.divide((prefix_length,)))
+
+    return g
+
+
+def join_lines(renderables: Iterable[ConsoleRenderable]) -> Iterator[ConsoleRenderable]:
+    """
+    Join runs of consecutive Texts into single Texts,
+    which are much cheaper to render than the same lines one by one.
+    """
+    lines: List[Text] = []
+    for renderable in renderables:
+        if isinstance(renderable, Text):
+            lines.append(renderable)
+            continue
+
+        if lines:
+            yield NEWLINE.join(lines)
+            lines = []
+
+        yield renderable
+
+    if lines:
+        yield NEWLINE.join(lines)
+
+
+MESSAGE_BATCH_SIZE = 256
+REFRESH_BACKLOG_THRESHOLD = 100
+
+
 @dataclass
 class Renderer:
+    __slots__ = (
+        "config",
+        "commands",
+        "console",
+        "verbosity",
+        "messages",
+        "events",
+        "message_handlers",
+    )
+
     config: RendererConfig
     commands: Dict[CommandConfig, Optional[Command]]
     console: Console
@@ -96,6 +187,12 @@ class Renderer:
     messages: Queue[Message]
     events: Queue[Event]
 
+    def __post_init__(self) -> None:
+        self.message_handlers: Dict[Type[Message], Callable[[Any], Awaitable[None]]] = {
+            InternalMessage: self.filter_internal_message,
+            CommandMessage: self.handle_command_message,
+        }
+
     def available_process_width(self, command_config: CommandConfig) -> int:
         raise NotImplementedError
 
@@ -106,18 +203,26 @@ class Renderer:
         pass
 
     async def run(self, drain: bool = False) -> None:
+        if drain:
+            # Draining never waits on an empty queue, so there is no need to run
+            # the handlers concurrently (or to create tasks for them, since this
+            # is called repeatedly during shutdown).
+            await self.handle_events(drain=True)
+            await self.handle_messages(drain=True)
+            return
+
         done, pending = await wait(
             (
-                create_task(
-                    self.handle_events(drain=drain), name=f"{type(self).__name__} event handler"
-                ),
-                create_task(
-                    self.handle_messages(drain=drain), name=f"{type(self).__name__} message handler"
-                ),
+                create_task(self.handle_events(), name=f"{type(self).__name__} event handler"),
+                create_task(self.handle_messages(), name=f"{type(self).__name__} message handler"),
             ),
-            return_when=ALL_COMPLETED if drain else FIRST_EXCEPTION,
+            return_when=FIRST_EXCEPTION,
         )
 
+        for p in pending:
+            p.cancel()
+        await gather(*pending, return_exceptions=True)
+
         for d in done:
             d.result()
 
@@ -126,14 +231,13 @@ class Renderer:
             if drain and self.events.empty():
                 return
 
-            event = await self.events.get()
-
-            if event.type is EventType.Started:
-                await self.handle_started_event(event)
-            elif event.type is EventType.Stopped:
-                await self.handle_stopped_event(event)
+            for event in await drain_queue(self.events):
+                if event.type is EventType.Started:
+                    await self.handle_started_event(event)
+                elif event.type is EventType.Stopped:
+                    await self.handle_stopped_event(event)
 
-            self.events.task_done()
+                self.events.task_done()
 
     async def handle_started_event(self, event: Event) -> None:
         self.commands[event.manager.config] = event.manager
@@ -146,15 +250,22 @@ class Renderer:
             if drain and self.messages.empty():
                 return
 
-            message = await self.messages.get()
+            for message in await drain_queue(self.messages, max_items=MESSAGE_BATCH_SIZE):
+                handler = self.message_handlers.get(type(message))
+                if handler is not None:
+                    await handler(message)
 
-            if isinstance(message, InternalMessage):
-                if message.verbosity >= self.verbosity:
-                    await self.handle_internal_message(message)
-            elif isinstance(message, CommandMessage):
-                await self.handle_command_message(message)
+                self.messages.task_done()
 
-            self.messages.task_done()
+            await self.flush()
+
+            # Handling a batch of messages never suspends,
+            # so yield once per batch to let producers make progress.
+            await sleep(0)
+
+    async def filter_internal_message(self, message: InternalMessage) -> None:
+        if message.verbosity >= self.verbosity:
+            await self.handle_internal_message(message)
 
     async def handle_internal_message(self, message: InternalMessage) -> None:
         pass
@@ -162,6 +273,9 @@ class Renderer:
     async def handle_command_message(self, message: CommandMessage) -> None:
         pass
 
+    async def flush(self) -> None:
+        pass
+
 
 @dataclass
 class NullRenderer(Renderer):
@@ -177,10 +291,52 @@ RED_X = Text("✘", style="red")
 class LogRenderer(Renderer):
     config: LogRendererConfig
 
+    def __post_init__(self) -> None:
+        super().__post_init__()
+
+        # These are keyed on id() because hashing a CommandConfig hashes every field;
+        # each config is stored alongside its entry so that its id stays unique.
+        self.command_prefixes: Dict[int, Tuple[CommandConfig, PrefixTemplate]] = {}
+        self.prefix_widths: Dict[int, Tuple[CommandConfig, int]] = {}
+
+        self.pending: List[ConsoleRenderable] = []
+
+        self.status_changed = asyncio.Event()
+
+    def command_prefix(self, command_config: CommandConfig) -> PrefixTemplate:
+        entry = self.command_prefixes.get(id(command_config))
+        if entry is None:
+            entry = self.command_prefixes[id(command_config)] = (
+                command_config,
+                PrefixTemplate.parse(
+                    command_config.prefix or self.config.prefix,
+                    style=Style.parse(command_config.prefix_style or self.config.prefix_style),
+                ).bind({"name": command_config.name}),
+            )
+
+        return entry[1]
+
+    @cached_property
+    def internal_prefix(self) -> PrefixTemplate:
+        return PrefixTemplate.parse(
+            self.config.internal_prefix, style=Style.parse(self.config.internal_prefix_style)
+        )
+
+    @cached_property
+    def internal_message_style(self) -> Style:
+        return Style.parse(self.config.internal_message_style)
+
     def prefix_width(self, command_config: CommandConfig) -> int:
-        return self.render_command_prefix(
-            CommandMessage(text="", command_config=command_config)
-        ).cell_len
+        entry = self.prefix_widths.get(id(command_config))
+        if entry is None:
+            entry = self.prefix_widths[id(command_config)] = (
+                command_config,
+                self.render_command_prefix(
+                    CommandMessage(text="", command_config=command_config, created_at=time.time())
+                ).cell_len,
+            )
+
+        return entry[1]
 
     def available_process_width(self, command_config: CommandConfig) -> int:
         return get_terminal_size().columns - self.prefix_width(command_config)
@@ -196,6 +352,7 @@ class LogRenderer(Renderer):
                 show_task_status=self.verbosity.is_debug,
             ),
             transient=True,
+            auto_refresh=False,  # we refresh it ourselves in mount()
         )
 
     async def mount(self) -> None:
@@ -205,49 +362,81 @@ class LogRenderer(Renderer):
         self.live.start()
 
         while True:
-            await asyncio.sleep(1 / 20)
+            # Every refresh re-renders the status table,
+            # so back off while there is a backlog of output to print.
+            # Commands starting or stopping are shown right away, regardless.
+            backlogged = self.messages.qsize() > REFRESH_BACKLOG_THRESHOLD
+            try:
+                await asyncio.wait_for(
+                    self.status_changed.wait(), timeout=1 / 5 if backlogged else 1 / 10
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self.status_changed.clear()
             self.live.refresh()
 
     async def unmount(self) -> None:
         self.live.stop()
 
+    async def handle_started_event(self, event: Event) -> None:
+        await super().handle_started_event(event)
+        self.status_changed.set()
+
+    async def handle_stopped_event(self, event: Event) -> None:
+        await super().handle_stopped_event(event)
+        self.status_changed.set()
+
     async def handle_internal_message(self, message: InternalMessage) -> None:
-        self.console.print(self.render_internal_message(message), soft_wrap=True)
+        self.pending.append(self.render_internal_message(message))
 
     def render_internal_message(self, message: InternalMessage) -> ConsoleRenderable:
-        prefix = Text.from_markup(
-            self.config.internal_prefix.format_map({"timestamp": message.timestamp}),
-            style=self.config.internal_prefix_style,
-        )
-        body = Text(
-            message.text,
-            style=self.config.internal_message_style,
-        )
+        prefix = self.render_internal_prefix(message)
+        text = Text.assemble(prefix, (message.text, self.internal_message_style))
 
-        g = Table.grid()
-        g.add_row(prefix, body)
+        return wrap_after_prefix(text, len(prefix), self.console.width)
 
-        return g
+    def render_internal_prefix(self, message: InternalMessage) -> Text:
+        prefix = self.internal_prefix
+        return prefix.render({"timestamp": message.timestamp} if prefix.uses("timestamp") else {})
 
     async def handle_command_message(self, message: CommandMessage) -> None:
-        self.console.print(self.render_command_message(message), soft_wrap=True)
+        self.pending.append(self.render_command_message(message))
+
+    async def flush(self) -> None:
+        if not self.pending:
+            return
+
+        # Every print also redraws the live status table,
+        # so print everything rendered during a batch at once.
+        # Everything in the batch is already a styled renderable,
+        # so skip the console's markup, emoji and highlighting passes.
+        self.console.print(
+            Group(*join_lines(self.pending)),
+            soft_wrap=True,
+            markup=False,
+            emoji=False,
+            highlight=False,
+        )
+        self.pending.clear()
 
     def render_command_message(self, message: CommandMessage) -> ConsoleRenderable:
-        g = Table.grid()
-        g.add_row(self.render_command_prefix(message), ansi_to_text(message.text))
+        text = Text()
+        text.append_text(self.render_command_prefix(message))
+        prefix_length = len(text)
+        append_ansi(text, message.text)
 
-        return g
+        return wrap_after_prefix(text, prefix_length, self.console.width)
 
     def render_command_prefix(self, message: CommandMessage) -> Text:
-        return Text.from_markup(
-            (message.command_config.prefix or self.config.prefix).format_map(
-                {
-                    "name": message.command_config.name,
-                    "timestamp": message.timestamp,
-                }
-            ),
-            style=message.command_config.prefix_style or self.config.prefix_style,
-        )
+        prefix = self.command_prefix(message.command_config)
+
+        # Messages only carry a raw time, so skip building a datetime if it won't be shown.
+        fields: Dict[str, object] = {"name": message.command_config.name}
+        if prefix.uses("timestamp"):
+            fields["timestamp"] = message.timestamp
+
+        return prefix.render(fields)
 
 
 def make_spinner(start_time: float) -> RenderableType:
@@ -256,13 +445,53 @@ def make_spinner(start_time: float) -> RenderableType:
     return s.render(time.time())
 
 
-@dataclass(frozen=True)
+TASK_STATUS_REFRESH_INTERVAL = 1
+
+
+@lru_cache(maxsize=None)
+def file_name(path: str) -> str:
+    return Path(path).name
+
+
+# The status table is redrawn many times a second, but these cells only change
+# when a command starts or stops, or once a second, so reuse their Texts.
+@lru_cache(maxsize=1024)
+def pid_text(pid: int) -> Text:
+    return Text(str(pid))
+
+
+@lru_cache(maxsize=1024)
+def elapsed_text(seconds: int) -> Text:
+    return Text(str(timedelta(seconds=seconds)))
+
+
+@lru_cache(maxsize=None)
+def exit_code_text(exit_code: int) -> Text:
+    return Text(str(exit_code), style=GREEN_STYLE if exit_code == 0 else RED_STYLE)
+
+
+@dataclass
 class StatusTable:
+    __slots__ = (
+        "loop",
+        "config",
+        "commands",
+        "show_task_status",
+        "task_table",
+        "task_table_built_at",
+    )
+
     loop: AbstractEventLoop
     config: LogRendererConfig
     commands: Dict[CommandConfig, Optional[Command]]
     show_task_status: bool
 
+    def __post_init__(self) -> None:
+        # Walking every task's stack is expensive, so the task table is only
+        # rebuilt every TASK_STATUS_REFRESH_INTERVAL seconds, not every frame.
+        self.task_table: Optional[Table] = None
+        self.task_table_built_at = 0.0
+
     def __rich__(self) -> ConsoleRenderable:
         table = Table(
             Column(""),
@@ -290,15 +519,12 @@ class StatusTable:
                     else make_spinner(command.start_time)
                 )
 
-                exit_code_column = (
-                    Text(str(command.exit_code), style=GREEN_STYLE if good_exit else RED_STYLE)
-                    if command.has_exited
-                    else DASH_TEXT
-                )
+                exit_code = command.exit_code
+                exit_code_column = exit_code_text(exit_code) if exit_code is not None else DASH_TEXT
 
-                pid_column = Text(str(command.process.pid))
+                pid_column = pid_text(command.process.pid)
 
-                elapsed_column = Text(str(timedelta(seconds=int(command.elapsed_time))))
+                elapsed_column = elapsed_text(int(command.elapsed_time))
 
                 cpu_percent = command.stats.get("cpu_percent")
                 cpu_column = Text(f"{cpu_percent:>4.1f}%") if cpu_percent else DASH_TEXT
@@ -323,32 +549,48 @@ class StatusTable:
                 cpu_column,
                 memory_column,
                 Text(config.command_string, style=config.prefix_style or self.config.prefix_style),
-                Text(config.starter.description, style=Style(dim=True, italic=True)),
-                style=Style(dim=command is None),
+                Text(config.starter.description, style=DIM_ITALIC_STYLE),
+                style=DIM_STYLE if command is None else NOT_DIM_STYLE,
             )
 
         tables = [table]
 
         if self.show_task_status:
-            debug_table = Table.grid(expand=False, padding=(0, 1))
-            active_task = current_task(self.loop)
-            for task in sorted(all_tasks(self.loop), key=lambda task: task.get_name()):
-                frame = task.get_stack(limit=1)[0]
-                code = frame.f_code
-
-                debug_table.add_row(
-                    Text(task.get_name()),
-                    Text(f"{Path(code.co_filename).name}:{frame.f_lineno}::{code.co_name}"),
-                    style=Style(dim=task is not active_task),
-                )
-
-            tables.append(debug_table)
+            tables.append(self.render_task_table())
 
         ubertable = Table.grid(expand=True, padding=(0, 2))
         ubertable.add_row(*tables)
 
         return Group(DIM_RULE, ubertable)
 
+    def render_task_table(self) -> Table:
+        now = time.monotonic()
+        if (
+            self.task_table is not None
+            and now - self.task_table_built_at < TASK_STATUS_REFRESH_INTERVAL
+        ):
+            return self.task_table
+
+        task_table = Table.grid(expand=False, padding=(0, 1))
+        active_task = current_task(self.loop)
+        named_tasks = sorted(
+            ((task.get_name(), task) for task in all_tasks(self.loop)), key=itemgetter(0)
+        )
+        for name, task in named_tasks:
+            frame = task.get_stack(limit=1)[0]
+            code = frame.f_code
+
+            task_table.add_row(
+                Text(name),
+                Text(f"{file_name(code.co_filename)}:{frame.f_lineno}::{code.co_name}"),
+                style=NOT_DIM_STYLE if task is active_task else DIM_STYLE,
+            )
+
+        self.task_table = task_table
+        self.task_table_built_at = now
+
+        return task_table
+
 
 RENDERERS: Mapping[Literal["null", "log"], Type[Renderer]] = {
     "null": NullRenderer,
@@ -14,10 +14,15 @@ def delay(delay: float, fn: Callable[[], Awaitable[T]], name: Optional[str] = No
     return create_task(delayed(), name=name)
 
 
-async def drain_queue(queue: Queue[T], *, buffer: Optional[float] = None) -> List[T]:
+async def drain_queue(
+    queue: Queue[T], *, buffer: Optional[float] = None, max_items: Optional[int] = None
+) -> List[T]:
     items = [await queue.get()]
 
     while True:
+        if max_items is not None and len(items) >= max_items:
+            break
+
         try:
             items.append(queue.get_nowait())
         except QueueEmpty:
@@ -1,20 +1,22 @@
 from __future__ import annotations
 
+import os
+import time
 from asyncio import AbstractEventLoop, Queue
 from dataclasses import dataclass, field
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
 from types import TracebackType
-from typing import Callable, ContextManager, Optional, Type
+from typing import Callable, ContextManager, Dict, Optional, Type
 
-import git
-from git import NoSuchPathError
-from gitignore_parser import parse_gitignore
-from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.events import EVENT_TYPE_MODIFIED, FileSystemEvent, FileSystemEventHandler
 from watchdog.observers import Observer
 from watchdog.observers.polling import PollingObserver
 
 from brood.config import CommandConfig, WatchConfig
+from brood.gitignore import GitIgnore
+
+DEBOUNCE_MAX_PATHS = 4096
 
 
 @dataclass
@@ -27,11 +29,22 @@ class FileWatcher(ContextManager["FileWatcher"]):
 
     def start(self) -> FileWatcher:
         for path in self.config.paths:
-            self.observer.schedule(self.event_handler, str(path), recursive=True)
+            self.schedule(path)
         self.observer.start()
 
         return self
 
+    def schedule(self, path: str) -> None:
+        # Parse the .gitignore now, instead of while handling the first event.
+        # Ignored paths are filtered out by the event handler; watching each
+        # subdirectory on its own instead would use up inotify instances,
+        # and would need to track directories being deleted and moved.
+        git_root = get_git_root(path)
+        if git_root is not None:
+            get_ignorer(os.path.join(git_root, ".gitignore"))
+
+        self.observer.schedule(self.event_handler, path, recursive=True)
+
     def stop(self) -> FileWatcher:
         self.observer.stop()
         return self
@@ -56,6 +69,8 @@ class FileWatcher(ContextManager["FileWatcher"]):
 
 @dataclass(frozen=True)
 class WatchEvent:
+    __slots__ = ("command_config", "event")
+
     command_config: CommandConfig
     event: FileSystemEvent
 
@@ -66,32 +81,81 @@ class StartCommandHandler(FileSystemEventHandler):
     command_config: CommandConfig
     event_queue: Queue[WatchEvent] = field(default_factory=Queue)
 
+    # Editors often touch a file several times per save; only the first event in a burst is used
+    # (see WatchConfig.debounce).
+    last_seen_ns: Dict[str, int] = field(default_factory=dict)
+
     def on_any_event(self, event: FileSystemEvent) -> None:
-        try:
-            git_root = get_git_root(Path(event.src_path))
+        # A directory is "modified" whenever an entry in it changes,
+        # and we'll see a separate event for that entry anyway.
+        if event.is_directory and event.event_type == EVENT_TYPE_MODIFIED:
+            return
+
+        # This runs for every file event, so stick to plain strings and os.path.
+        src_path = event.src_path
 
-            if get_ignorer(git_root / ".gitignore")(event.src_path):
-                return
-        except NoSuchPathError:
+        now = time.monotonic_ns()
+        last_seen = self.last_seen_ns.get(src_path)
+        if last_seen is not None and now - last_seen < self.debounce_ns:
+            return
+
+        if len(self.last_seen_ns) >= DEBOUNCE_MAX_PATHS:
+            self.last_seen_ns.clear()
+        self.last_seen_ns[src_path] = now
+
+        git_root = get_git_root(os.path.dirname(src_path))
+
+        if git_root is not None and get_ignorer(os.path.join(git_root, ".gitignore")).match(
+            src_path, is_dir=event.is_directory
+        ):
             return
-        except Exception:
-            pass
 
         self.loop.call_soon_threadsafe(
-            self.event_queue.put_nowait, WatchEvent(command_config=self.command_config, event=event)
+            self.enqueue, WatchEvent(command_config=self.command_config, event=event)
         )
 
+    @cached_property
+    def debounce_ns(self) -> int:
+        starter = self.command_config.starter
+        return round(starter.debounce * 1e9) if isinstance(starter, WatchConfig) else 0
+
+    @cached_property
+    def enqueue(self) -> Callable[[WatchEvent], None]:
+        return self.event_queue.put_nowait
+
     def __hash__(self) -> int:
         return hash((type(self), id(self)))
 
 
-@lru_cache(maxsize=None)
-def get_git_root(path: Path) -> Path:
-    git_repo = git.Repo(str(path), search_parent_directories=True)
-    git_root = git_repo.git.rev_parse("--show-toplevel")
-    return Path(git_root)
+def get_git_root(directory: str) -> Optional[str]:
+    # Normalize so that e.g. "src", "./src", and "src/" share a cache entry.
+    return find_git_root(os.path.abspath(directory))
+
+
+@lru_cache(maxsize=4096)
+def find_git_root(directory: str) -> Optional[str]:
+    # Cached per directory (not per file), so every file in a directory shares one lookup.
+    candidate = directory
+    while True:
+        if os.path.exists(os.path.join(candidate, ".git")):
+            return candidate
+
+        parent = os.path.dirname(candidate)
+        if parent == candidate:
+            return None
+        candidate = parent
+
+
+def get_ignorer(path: str) -> GitIgnore:
+    # Keying on the modification time picks up edits to the .gitignore while we're running.
+    try:
+        mtime_ns: Optional[int] = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+
+    return parse_ignorer(path, mtime_ns)
 
 
-@lru_cache(maxsize=None)
-def get_ignorer(path: Path) -> Callable[[str], bool]:
-    return parse_gitignore(str(path))
+@lru_cache(maxsize=128)
+def parse_ignorer(path: str, mtime_ns: Optional[int]) -> GitIgnore:
+    return GitIgnore.parse(Path(path))
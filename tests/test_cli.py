@@ -1,10 +1,13 @@
-from typing import List
+import asyncio
+import sys
+from types import SimpleNamespace
+from typing import Any, Coroutine, List
 
 import pytest
 from typer.testing import CliRunner
 
 from brood.constants import PACKAGE_NAME, __version__
-from brood.main import app
+from brood.main import app, run_event_loop
 
 
 def test_help(runner: CliRunner) -> None:
@@ -26,3 +29,30 @@ def test_schema(runner: CliRunner, args: List[str]) -> None:
     result = runner.invoke(app, ["schema", *args])
 
     assert result.exit_code == 0
+
+
+async def record(calls: List[str]) -> None:
+    calls.append("main")
+
+
+def test_run_event_loop_without_uvloop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "uvloop", None)  # makes importing it raise ImportError
+
+    calls: List[str] = []
+    run_event_loop(record(calls))
+
+    assert calls == ["main"]
+
+
+def test_run_event_loop_with_uvloop(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: List[str] = []
+
+    def run(main: Coroutine[Any, Any, None], debug: bool) -> None:
+        calls.append(f"uvloop.run(debug={debug})")
+        asyncio.run(main)
+
+    monkeypatch.setitem(sys.modules, "uvloop", SimpleNamespace(run=run))
+
+    run_event_loop(record(calls), debug=True)
+
+    assert calls == ["uvloop.run(debug=True)", "main"]
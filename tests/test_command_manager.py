@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from asyncio import Queue
-from typing import Tuple
+from typing import List, Tuple
 
 import pytest
 
@@ -126,3 +126,24 @@ async def test_can_kill_after_exit(once_manager: Command, command: str) -> None:
     await once_manager.wait()
 
     await once_manager.kill()
+
+
+@pytest.mark.parametrize(
+    "command, lines",
+    [
+        ("printf 'ab'; sleep 0.1; printf 'c\\n'", ["abc"]),  # split across reads
+        ("head -c 100000 /dev/zero | tr '\\0' a; echo", ["a" * 100_000]),  # longer than a read
+        ("printf 'a\\r\\nb\\r\\n'", ["a", "b"]),
+        ("printf 'a\\nb'", ["a", "b"]),  # no trailing newline
+        ("printf 'a\\377b\\n'", ["a\ufffdb"]),  # invalid UTF-8
+        ("printf 'a\\n\\n\\nb\\n'", ["a", "", "", "b"]),
+    ],
+)
+async def test_command_output_split_into_lines(
+    once_manager: Command, messages: Queue[Message], command: str, lines: List[str]
+) -> None:
+    await once_manager.wait()
+
+    drained = await drain_queue(messages)
+
+    assert [message.text for message in drained if isinstance(message, CommandMessage)] == lines
@@ -1,3 +1,5 @@
+from asyncio import create_task, sleep
+
 from brood.fanout import Fanout
 from brood.utils import drain_queue
 
@@ -13,3 +15,23 @@ async def test_each_subscriber_gets_each_message() -> None:
 
     assert await drain_queue(a, buffer=None) == [0, 1]
     assert await drain_queue(b, buffer=None) == [0, 1]
+
+
+async def test_put_waits_for_room_in_bounded_consumers() -> None:
+    fq: Fanout[int] = Fanout()
+
+    a = fq.consumer(maxsize=1)
+    b = fq.consumer()
+
+    await fq.put(0)
+
+    put = create_task(fq.put(1))
+    await sleep(0)
+
+    assert not put.done()
+
+    assert await a.get() == 0
+    await put
+
+    assert await drain_queue(a, buffer=None) == [1]
+    assert await drain_queue(b, buffer=None) == [0, 1]
@@ -0,0 +1,96 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from brood.gitignore import GitIgnore
+
+BASE = "/repo"
+
+
+@pytest.mark.parametrize(
+    "lines, path, is_dir, ignored",
+    [
+        ([], "foo.py", False, False),
+        (["*.py"], "foo.py", False, True),
+        (["*.py"], "src/foo.py", False, True),
+        (["*.py"], "foo.pyc", False, False),
+        (["foo"], "foo", False, True),
+        (["foo"], "src/foo", False, True),
+        (["foo"], "foo/bar.py", False, True),
+        (["foo"], "foobar", False, False),
+        (["/foo"], "foo", False, True),
+        (["/foo"], "src/foo", False, False),
+        (["src/foo"], "src/foo", False, True),
+        (["src/foo"], "lib/src/foo", False, False),
+        (["build/"], "build", False, False),
+        (["build/"], "build", True, True),
+        (["build/"], "build/out.txt", False, True),
+        (["build/"], "src/build/out.txt", False, True),
+        (["**/foo"], "foo", False, True),
+        (["**/foo"], "a/b/foo", False, True),
+        (["foo/**"], "foo/a/b", False, True),
+        (["foo/**"], "foo", True, False),
+        (["a/**/b"], "a/b", False, True),
+        (["a/**/b"], "a/x/y/b", False, True),
+        (["a/**/b"], "x/a/b", False, False),
+        (["a/*/b"], "a/x/b", False, True),
+        (["a/*/b"], "a/x/y/b", False, False),
+        (["?.txt"], "a.txt", False, True),
+        (["?.txt"], "ab.txt", False, False),
+        (["[ab].txt"], "a.txt", False, True),
+        (["[ab].txt"], "c.txt", False, False),
+        (["[!ab].txt"], "c.txt", False, True),
+        (["[a-c].txt"], "b.txt", False, True),
+        (["[z-a].txt", "*.log"], "a.log", False, True),
+        (["# comment"], "# comment", False, False),
+        (["\\#hash"], "#hash", False, True),
+        (["\\!bang"], "!bang", False, True),
+        (["trailing   "], "trailing", False, True),
+        (["space\\ "], "space ", False, True),
+        (["*.log", "!keep.log"], "debug.log", False, True),
+        (["*.log", "!keep.log"], "keep.log", False, False),
+        (["!keep.log", "*.log"], "keep.log", False, True),
+        (["logs/", "!logs/keep.log"], "logs/keep.log", False, True),
+        (["*.py", "!src/", "*.txt"], "src/foo.py", False, True),
+    ],
+)
+def test_match(lines: List[str], path: str, is_dir: bool, ignored: bool) -> None:
+    gitignore = GitIgnore.from_lines(lines, base=BASE)
+
+    assert gitignore.match(f"{BASE}/{path}", is_dir=is_dir) is ignored
+
+
+def test_paths_outside_the_base_are_not_ignored() -> None:
+    gitignore = GitIgnore.from_lines(["*"], base=BASE)
+
+    assert not gitignore.match("/repository/foo")
+    assert not gitignore.match(BASE)
+
+
+def test_parse_reads_the_file(tmp_path: Path) -> None:
+    path = tmp_path / ".gitignore"
+    path.write_text("*.pyc\n__pycache__/\n")
+
+    gitignore = GitIgnore.parse(path)
+
+    assert gitignore.match(str(tmp_path / "foo.pyc"))
+    assert gitignore.match(str(tmp_path / "__pycache__" / "foo.cpython-39.pyc"))
+    assert not gitignore.match(str(tmp_path / "foo.py"))
+
+
+def test_missing_file_ignores_nothing(tmp_path: Path) -> None:
+    gitignore = GitIgnore.parse(tmp_path / ".gitignore")
+
+    assert not gitignore.match(str(tmp_path / "foo.pyc"))
+
+
+def test_directory_verdicts_are_remembered() -> None:
+    gitignore = GitIgnore.from_lines(["build/", "*.pyc"], base=BASE)
+
+    for _ in range(2):
+        assert gitignore.match(f"{BASE}/build/lib/foo.py")
+        assert gitignore.match(f"{BASE}/src/foo.pyc")
+        assert not gitignore.match(f"{BASE}/src/foo.py")
+
+    assert gitignore.directories == {"build": True, "build/lib": True, "src": False}
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
-from asyncio import Queue, create_task, sleep
+from asyncio import Queue, create_task, sleep, wait_for
+from collections import defaultdict
 
+from brood.command import Event, EventType
+from brood.config import BroodConfig, CommandConfig, OnceConfig
+from brood.fanout import Fanout
+from brood.message import CommandMessage, Message
+from brood.monitor import Monitor
 from brood.utils import drain_queue
 
 
@@ -28,3 +34,57 @@ async def test_drain_queue() -> None:
 
     assert queue.qsize() == 1
     assert [0] == await drain_queue(queue, buffer=None)
+
+
+async def test_drain_queue_with_max_items() -> None:
+    queue: Queue[float] = Queue()
+
+    for s in range(5):
+        await queue.put(s)
+
+    assert [0, 1, 2] == await drain_queue(queue, max_items=3)
+    assert [3, 4] == await drain_queue(queue, max_items=3)
+
+
+async def test_stop_after_waiters_are_cancelled() -> None:
+    events: Fanout[Event] = Fanout()
+    messages: Fanout[Message] = Fanout()
+    messages_consumer = messages.consumer()
+
+    monitor = Monitor(
+        config=BroodConfig(
+            commands=[
+                CommandConfig(
+                    name="test",
+                    command="sleep 10",
+                    shutdown="echo bye",
+                    starter=OnceConfig(),
+                )
+            ]
+        ),
+        events=events,
+        messages=messages,
+        widths=defaultdict(lambda: 80),
+    )
+
+    await monitor.start_commands()
+
+    event = await monitor.events_consumer.get()
+    assert event.type is EventType.Started
+    monitor.managers.add(event.manager)
+    monitor.events_consumer.task_done()
+
+    # This is what asyncio.run does to every remaining task on Ctrl-C.
+    for manager in monitor.managers:
+        assert manager.waiter is not None
+        manager.waiter.cancel()
+    await sleep(0)
+
+    await wait_for(monitor.stop(), timeout=5)
+
+    assert not monitor.managers
+    assert "bye" in [
+        message.text
+        for message in await drain_queue(messages_consumer)
+        if isinstance(message, CommandMessage)
+    ]
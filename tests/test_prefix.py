@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+from rich.console import Console
+from rich.segment import Segment
+
+from brood.prefix import PrefixTemplate
+
+FIELDS = {"name": "test", "timestamp": datetime(2021, 10, 1, 12, 34, 56, 789)}
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "",
+        "plain ",
+        "{name} ",
+        "{timestamp:%H:%M:%S.%f} {name} ",
+        "[bold]{name}[/bold] ",
+        "[red]{timestamp:%H:%M:%S}[/red] [bold blue]{name}[/] ",
+        "[bold]{name}: [italic]{name!r}[/italic][/bold] ",
+        "{{literal braces}} {name} ",
+    ],
+)
+@pytest.mark.parametrize("style", ["", "green"])
+def test_parsed_template_renders_like_formatted_markup(
+    console: Console, template: str, style: str
+) -> None:
+    prefix = PrefixTemplate.parse(template, style=style)
+
+    assert prefix.parts is not None
+
+    rendered = prefix.render(FIELDS)
+    expected = PrefixTemplate(template=template, style=style, parts=None).render(FIELDS)
+
+    assert list(Segment.simplify(console.render(rendered))) == list(
+        Segment.simplify(console.render(expected))
+    )
+
+
+@pytest.mark.parametrize("template", ["[{name}]x[/]", "{}", "{name:{width}}"])
+def test_templates_that_cannot_be_parsed_fall_back_to_markup(template: str) -> None:
+    assert PrefixTemplate.parse(template).parts is None
+
+
+@pytest.mark.parametrize("bind", [False, True])
+def test_field_values_are_not_parsed_as_markup(bind: bool) -> None:
+    fields = {"name": "[red]x[/red]"}
+    prefix = PrefixTemplate.parse("[bold]{name}[/bold] ")
+    if bind:
+        prefix = prefix.bind(fields)
+
+    rendered = prefix.render(fields)
+
+    assert rendered.plain == "[red]x[/red] "
+    assert [(span.start, span.end, span.style) for span in rendered.spans] == [(0, 12, "bold")]
+
+
+def test_templates_without_fields_are_rendered_once() -> None:
+    prefix = PrefixTemplate.parse("[bold]constant[/bold] ")
+
+    assert prefix.constant is not None
+
+    rendered = prefix.render(FIELDS)
+
+    assert rendered is not prefix.constant
+    assert rendered.plain == "constant "
+
+
+def test_bound_fields_are_rendered_ahead_of_time(console: Console) -> None:
+    template = "[red]{timestamp:%H:%M:%S}[/red] [bold blue]{name}[/] "
+    prefix = PrefixTemplate.parse(template).bind({"name": FIELDS["name"]})
+
+    assert prefix.parts is not None
+    assert len(prefix.parts) == 2
+
+    rendered = prefix.render({"timestamp": FIELDS["timestamp"]})
+    expected = PrefixTemplate.parse(template).render(FIELDS)
+
+    assert list(Segment.simplify(console.render(rendered))) == list(
+        Segment.simplify(console.render(expected))
+    )
+
+
+def test_binding_every_field_makes_a_constant_template() -> None:
+    prefix = PrefixTemplate.parse("[bold]{name}[/bold] ").bind(FIELDS)
+
+    assert prefix.constant is not None
+    assert prefix.constant.plain == "test "
+
+
+@pytest.mark.parametrize(
+    "template, key, uses",
+    [
+        ("{name} ", "name", True),
+        ("{name} ", "timestamp", False),
+        ("{timestamp:%H} ", "timestamp", True),
+        ("{timestamp.hour} ", "timestamp", True),
+        ("[{timestamp}]x[/]", "timestamp", True),
+        ("[{timestamp}]x[/]", "name", True),
+    ],
+)
+def test_templates_know_which_fields_they_use(template: str, key: str, uses: bool) -> None:
+    assert PrefixTemplate.parse(template).uses(key) is uses
+
+
+def test_bound_fields_are_no_longer_used() -> None:
+    prefix = PrefixTemplate.parse("{timestamp:%H} {name} ").bind({"name": "test"})
+
+    assert not prefix.uses("name")
+    assert prefix.uses("timestamp")
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from io import StringIO
+from typing import List
+
+import pytest
+from colorama import Fore
+from colorama import Style as CStyle
+from rich.console import Console, ConsoleRenderable, Group
+from rich.style import Style
+from rich.table import Table
+from rich.text import Span, Text
+
+from brood.renderer import append_ansi, join_lines, wrap_after_prefix
+
+
+@pytest.mark.parametrize(
+    "s, plain",
+    [
+        ("hello", "hello"),
+        ("\x1b]0;title\x07hello", "hello"),
+        ("\x1b]0;title\x1b\\hello", "hello"),
+        ("a\x1b]8;;https://example.com\x1b\\link\x1b]8;;\x1b\\b", "alinkb"),
+        # other unknown escapes are passed through
+        ("a\x1b[2Kb", "a\x1b[2Kb"),
+        ("a\x1b[?25lb", "a\x1b[?25lb"),
+        ("a\x1b7b", "a\x1b7b"),
+        ("a\x1b[38;5;208mb", "a\x1b[38;5;208mb"),
+    ],
+)
+def test_append_ansi_plain_text(s: str, plain: str) -> None:
+    assert append_ansi(Text(), s).plain == plain
+
+
+RED = Style(color="red")
+
+
+@pytest.mark.parametrize(
+    "s, plain, spans",
+    [
+        (f"{Fore.RED}ab", "ab", [Span(0, 2, RED)]),
+        (f"a{Fore.RED}b{CStyle.RESET_ALL}c", "abc", [Span(1, 2, RED)]),
+        (f"{Fore.RED}a{Fore.BLUE}b", "ab", [Span(0, 1, RED), Span(1, 2, Style(color="blue"))]),
+        (
+            f"{CStyle.BRIGHT}a{Fore.GREEN}b{CStyle.NORMAL}c",
+            "abc",
+            [Span(0, 1, Style(bold=True)), Span(1, 2, Style(bold=True, color="green"))],
+        ),
+        (f"{CStyle.DIM}a{CStyle.RESET_ALL}", "a", [Span(0, 1, Style(dim=True))]),
+    ],
+)
+def test_append_ansi_styles(s: str, plain: str, spans: List[Span]) -> None:
+    text = append_ansi(Text(), s)
+
+    assert text.plain == plain
+    assert text.spans == spans
+
+
+def test_append_ansi_keeps_style_across_operating_system_commands() -> None:
+    text = append_ansi(Text(), f"{Fore.RED}a\x1b]0;title\x07b{CStyle.RESET_ALL}c")
+
+    assert text.plain == "abc"
+    assert text.spans == [Span(0, 1, RED), Span(1, 2, RED)]
+
+
+def test_wrap_after_prefix_returns_lines_that_fit_as_is() -> None:
+    text = Text("prefix output")
+
+    assert wrap_after_prefix(text, prefix_length=7, width=80) is text
+
+
+@pytest.mark.parametrize(
+    "s",
+    [
+        "prefix " + "x" * 80,  # too wide
+        "prefix one\ntwo",  # multiple lines
+        "prefix \tx",  # tabs are wider than their cell length
+    ],
+)
+def test_wrap_after_prefix_splits_off_the_prefix(s: str) -> None:
+    assert isinstance(wrap_after_prefix(Text(s), prefix_length=7, width=80), Table)
+
+
+def test_wrapped_lines_are_indented_past_the_prefix() -> None:
+    console = Console(width=20, record=True, force_terminal=True)
+
+    console.print(wrap_after_prefix(Text("prefix one two three four five"), 7, width=20))
+
+    assert [line.rstrip() for line in console.export_text().splitlines()] == [
+        "prefix one two three",
+        "       four five",
+    ]
+
+
+def record(renderables: List[ConsoleRenderable], batched: bool) -> str:
+    console = Console(width=20, file=StringIO(), record=True, force_terminal=True)
+
+    if batched:
+        console.print(
+            Group(*join_lines(renderables)),
+            soft_wrap=True,
+            markup=False,
+            emoji=False,
+            highlight=False,
+        )
+    else:
+        for renderable in renderables:
+            console.print(renderable, soft_wrap=True)
+
+    return console.export_text(styles=True)
+
+
+def test_joined_lines_print_like_one_message_at_a_time() -> None:
+    renderables = [
+        wrap_after_prefix(Text(s, style=style), 7, width=20)
+        for s, style in [
+            ("prefix one", "bold"),
+            ("prefix [red]two", ""),
+            ("prefix three four five six", "italic"),
+            ("prefix seven", ""),
+            ("prefix eight\tnine", ""),
+            ("prefix ten", "red"),
+            ("prefix eleven", ""),
+        ]
+    ]
+
+    batched = record(renderables, batched=True)
+
+    assert batched == record(renderables, batched=False)
+    assert [line.rstrip() for line in Text.from_ansi(batched).plain.splitlines()] == [
+        "prefix one",
+        "prefix [red]two",
+        "prefix three four",
+        "       five six",
+        "prefix seven",
+        "prefix eight",
+        "       nine",
+        "prefix ten",
+        "prefix eleven",
+    ]
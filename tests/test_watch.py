@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import shutil
+import time
+from asyncio import Queue, get_running_loop, sleep, wait_for
+from pathlib import Path
+from typing import List
+
+import pytest
+from watchdog.events import DirModifiedEvent, FileModifiedEvent
+
+from brood.config import CommandConfig, WatchConfig
+from brood.watch import (
+    DEBOUNCE_MAX_PATHS,
+    FileWatcher,
+    StartCommandHandler,
+    WatchEvent,
+    find_git_root,
+    get_git_root,
+)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("ignored/\n")
+    (tmp_path / "ignored").mkdir()
+    (tmp_path / "src").mkdir()
+
+    return tmp_path
+
+
+def make_handler(debounce: float = 0.05) -> StartCommandHandler:
+    return StartCommandHandler(
+        get_running_loop(),
+        CommandConfig(name="test", command="echo hi", starter=WatchConfig(debounce=debounce)),
+    )
+
+
+def make_watcher(repo: Path, poll: bool, handler: StartCommandHandler) -> FileWatcher:
+    return FileWatcher(WatchConfig(paths=[str(repo)], poll=poll), handler)
+
+
+async def events_until(queue: Queue[WatchEvent], path: Path) -> List[str]:
+    async def collect() -> List[str]:
+        seen: List[str] = []
+        while True:
+            watch_event = await queue.get()
+            seen.append(watch_event.event.src_path)
+            if watch_event.event.src_path == str(path):
+                return seen
+
+    return await wait_for(collect(), timeout=5)
+
+
+@pytest.mark.parametrize("poll", [False, True])
+async def test_events_in_new_directories(repo: Path, poll: bool) -> None:
+    handler = make_handler()
+
+    with make_watcher(repo, poll, handler):
+        (repo / "new").mkdir()
+        await sleep(0.5)
+
+        path = repo / "new" / "file.txt"
+        path.write_text("hi")
+
+        await events_until(handler.event_queue, path)
+
+
+@pytest.mark.parametrize("poll", [False, True])
+async def test_events_in_recreated_directories(repo: Path, poll: bool) -> None:
+    handler = make_handler()
+
+    with make_watcher(repo, poll, handler):
+        shutil.rmtree(repo / "src")
+        await sleep(0.5)
+
+        (repo / "src").mkdir()
+        await sleep(0.5)
+
+        path = repo / "src" / "file.txt"
+        path.write_text("hi")
+
+        await events_until(handler.event_queue, path)
+
+
+@pytest.mark.parametrize("poll", [False, True])
+async def test_events_in_renamed_directories(repo: Path, poll: bool) -> None:
+    handler = make_handler()
+
+    with make_watcher(repo, poll, handler):
+        (repo / "src").rename(repo / "lib")
+        await sleep(0.5)
+
+        path = repo / "lib" / "file.txt"
+        path.write_text("hi")
+
+        await events_until(handler.event_queue, path)
+
+
+@pytest.mark.parametrize("poll", [False, True])
+async def test_events_in_ignored_directories_are_dropped(repo: Path, poll: bool) -> None:
+    handler = make_handler()
+
+    with make_watcher(repo, poll, handler):
+        (repo / "ignored" / "file.txt").write_text("hi")
+        (repo / "ignored" / "new").mkdir()
+        await sleep(0.5)
+
+        path = repo / "src" / "file.txt"
+        path.write_text("hi")
+
+        seen = await events_until(handler.event_queue, path)
+
+    assert not [p for p in seen if p.startswith(str(repo / "ignored"))]
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> List[int]:
+    now = [0]
+    monkeypatch.setattr(time, "monotonic_ns", lambda: now[0])
+    return now
+
+
+async def queued(handler: StartCommandHandler) -> List[str]:
+    await sleep(0)  # let the loop run the callbacks scheduled by the handler
+
+    return [watch_event.event.src_path for watch_event in drain_nowait(handler.event_queue)]
+
+
+def drain_nowait(queue: Queue[WatchEvent]) -> List[WatchEvent]:
+    items: List[WatchEvent] = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+async def test_events_for_the_same_path_are_debounced(repo: Path, clock: List[int]) -> None:
+    handler = make_handler()
+    path = str(repo / "src" / "file.txt")
+
+    assert handler.debounce_ns == 50_000_000
+
+    handler.on_any_event(FileModifiedEvent(path))
+    clock[0] += handler.debounce_ns - 1
+    handler.on_any_event(FileModifiedEvent(path))
+
+    assert await queued(handler) == [path]
+
+    clock[0] += handler.debounce_ns
+    handler.on_any_event(FileModifiedEvent(path))
+
+    assert await queued(handler) == [path]
+
+
+async def test_debouncing_can_be_disabled(repo: Path, clock: List[int]) -> None:
+    handler = make_handler(debounce=0)
+    path = str(repo / "src" / "file.txt")
+
+    handler.on_any_event(FileModifiedEvent(path))
+    handler.on_any_event(FileModifiedEvent(path))
+
+    assert await queued(handler) == [path, path]
+
+
+async def test_events_for_different_paths_are_not_debounced(repo: Path, clock: List[int]) -> None:
+    handler = make_handler()
+    paths = [str(repo / "src" / "a.txt"), str(repo / "src" / "b.txt")]
+
+    for path in paths:
+        handler.on_any_event(FileModifiedEvent(path))
+
+    assert await queued(handler) == paths
+
+
+async def test_debounce_table_is_reset_when_full(repo: Path, clock: List[int]) -> None:
+    handler = make_handler()
+    paths = [str(repo / "src" / f"{n}.txt") for n in range(DEBOUNCE_MAX_PATHS)]
+
+    for path in paths:
+        handler.on_any_event(FileModifiedEvent(path))
+
+    assert len(handler.last_seen_ns) == DEBOUNCE_MAX_PATHS
+
+    extra = str(repo / "src" / "extra.txt")
+    handler.on_any_event(FileModifiedEvent(extra))
+
+    assert handler.last_seen_ns == {extra: clock[0]}
+
+    # The first path was forgotten, so it isn't debounced anymore.
+    handler.on_any_event(FileModifiedEvent(paths[0]))
+
+    assert await queued(handler) == [*paths, extra, paths[0]]
+
+
+async def test_modified_directories_are_dropped(repo: Path) -> None:
+    handler = make_handler()
+
+    handler.on_any_event(DirModifiedEvent(str(repo / "src")))
+
+    assert await queued(handler) == []
+
+
+async def test_ignored_paths_are_dropped(repo: Path) -> None:
+    handler = make_handler()
+
+    handler.on_any_event(FileModifiedEvent(str(repo / "ignored" / "file.txt")))
+    handler.on_any_event(FileModifiedEvent(str(repo / "src" / "file.txt")))
+
+    assert await queued(handler) == [str(repo / "src" / "file.txt")]
+
+
+def test_find_git_root_walks_up_to_the_repository(repo: Path) -> None:
+    nested = repo / "src" / "a" / "b"
+    nested.mkdir(parents=True)
+
+    assert find_git_root(str(nested)) == str(repo)
+    assert find_git_root(str(repo)) == str(repo)
+
+
+def test_find_git_root_finds_the_nearest_repository(repo: Path) -> None:
+    submodule = repo / "src" / "submodule"
+    (submodule / "lib").mkdir(parents=True)
+    (submodule / ".git").write_text("gitdir: ../../.git/modules/submodule\n")
+
+    assert find_git_root(str(submodule / "lib")) == str(submodule)
+    assert find_git_root(str(repo / "src")) == str(repo)
+
+
+def test_get_git_root_normalizes_relative_paths(
+    repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(repo / "src")
+
+    assert get_git_root(".") == str(repo)
+    assert get_git_root("./") == str(repo)